@@ -7,15 +7,30 @@ import pyttsx3
 import speech_recognition as sr
 import tempfile
 import os
+import re
+import math
+import heapq
+import codecs
+import hashlib
+import random
+import threading
+import itertools
 import time
 import requests
-from bs4 import BeautifulSoup
+from html.parser import HTMLParser
 from pathlib import Path
+from collections import Counter
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 import pandas as pd
 from fpdf import FPDF
 import io
 import PyPDF2
 
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
 
 ################################################################################
 # DISCLAIMER: This code is for demonstration purposes only and does not provide
@@ -29,6 +44,16 @@ COUNTRIES = ["USA", "UK", "Pakistan", "Canada", "India", "International"]
 DB_NAME = "legal_ai_users.db"
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
+SCRAPE_MAX_BYTES = 1_000_000
+SCRAPE_CHUNK_SIZE = 16_384
+SCRAPE_PARSER = "lxml" if etree is not None else "html.parser"
+MINHASH_PERMUTATIONS = 64
+NEAR_DUPLICATE_THRESHOLD = 0.8
+SHINGLE_SIZE = 3
+MINHASH_MAX_TOKENS = 2000
+SINGLE_FLIGHT_TIMEOUT = 30
+RESULTS_PAGE_SIZE = 10
+SCRAPED_PREVIEW_CHARS = 500
 
 #####################
 # STREAMLIT PAGE SETUP & CUSTOM CSS
@@ -154,6 +179,12 @@ if "voice_input" not in st.session_state:
     st.session_state.voice_input = ""
 if "country" not in st.session_state:
     st.session_state.country = "USA"
+if "chat_history" not in st.session_state:
+    st.session_state.chat_history = []
+if "chat_scores" not in st.session_state:
+    st.session_state.chat_scores = {}
+if "chat_index_key" not in st.session_state:
+    st.session_state.chat_index_key = None
 
 #####################
 # USER AUTHENTICATION & REGISTRATION (Using SQLite)
@@ -191,7 +222,7 @@ if not st.session_state.authenticated:
 #####################
 def scrape_pdf(url):
     try:
-        response = requests.get(url)
+        response = requests.get(url, timeout=5)
         if response.status_code == 200:
             file_stream = io.BytesIO(response.content)
             reader = PyPDF2.PdfReader(file_stream)
@@ -361,7 +392,7 @@ class LegalKnowledgeBase:
 def duckduckgo_search(query):
     try:
         url = f"https://api.duckduckgo.com/?q={query}&format=json"
-        response = requests.get(url)
+        response = requests.get(url, timeout=5)
         results = []
         if response.status_code == 200:
             data = response.json()
@@ -383,32 +414,261 @@ def duckduckgo_search(query):
         st.error(f"Web search error: {str(e)}")
         return []
 
-def scrape_page(url, max_paragraphs=2):
+class ParagraphExtractor(HTMLParser):
+    """Incremental <p> collector that flags itself done once it has enough text."""
+
+    MAIN_TAGS = ("main", "article")
+    # html.parser does not close <p> implicitly. As in the HTML spec (and lxml),
+    # these start tags end an open paragraph...
+    P_CLOSING_TAGS = (
+        "address", "article", "aside", "blockquote", "details", "div", "dl", "fieldset",
+        "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+        "header", "hgroup", "hr", "main", "menu", "nav", "ol", "p", "pre", "section", "table", "ul"
+    )
+    # ...and so do these end tags.
+    BLOCK_TAGS = ("div", "section", "main", "article", "body")
+
+    def __init__(self, max_paragraphs):
+        super().__init__(convert_charrefs=True)
+        self.max_paragraphs = max_paragraphs
+        self.paragraphs = []
+        self.done = False
+        self._buffer = None
+        self._main_depth = 0
+        self._main_paragraphs = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.P_CLOSING_TAGS:
+            self._flush()
+        if tag == "p":
+            self._buffer = []
+        elif tag in self.MAIN_TAGS:
+            if self._main_depth == 0:
+                self._main_paragraphs = 0
+            self._main_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == "p" or tag in self.BLOCK_TAGS:
+            self._flush()
+        if tag in self.MAIN_TAGS and self._main_depth:
+            self._main_depth -= 1
+            if self._main_depth == 0 and self._main_paragraphs:
+                self.done = True
+
+    def handle_data(self, data):
+        if self._buffer is not None:
+            self._buffer.append(data)
+
+    def _flush(self):
+        if self._buffer is None:
+            return
+        text = "".join(self._buffer).strip()
+        self._buffer = None
+        if text and not self.done:
+            self.paragraphs.append(text)
+            if self._main_depth:
+                self._main_paragraphs += 1
+            if len(self.paragraphs) >= self.max_paragraphs:
+                self.done = True
+
+def _extract_paragraphs_stdlib(chunks, max_paragraphs, encoding):
+    extractor = ParagraphExtractor(max_paragraphs)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    for chunk in chunks:
+        extractor.feed(decoder.decode(chunk))
+        if extractor.done:
+            return extractor.paragraphs
+    extractor.feed(decoder.decode(b"", final=True))
+    extractor.close()
+    extractor._flush()
+    return extractor.paragraphs[:max_paragraphs]
+
+def _extract_paragraphs_lxml(chunks, max_paragraphs, encoding):
+    parser = etree.HTMLPullParser(events=("start", "end"), tag=("p", "main", "article"), encoding=encoding)
+    paragraphs = []
+    # Same region rule as ParagraphExtractor: stop when the outermost
+    # <main>/<article> closes, and only if it contained text.
+    region = {"depth": 0, "paragraphs": 0}
+
+    def collect():
+        for event, element in parser.read_events():
+            if element.tag == "p":
+                if event != "end":
+                    continue
+                text = "".join(element.itertext()).strip()
+                if text:
+                    paragraphs.append(text)
+                    if region["depth"]:
+                        region["paragraphs"] += 1
+                if len(paragraphs) >= max_paragraphs:
+                    return True
+            elif event == "start":
+                if region["depth"] == 0:
+                    region["paragraphs"] = 0
+                region["depth"] += 1
+            elif region["depth"]:
+                region["depth"] -= 1
+                if region["depth"] == 0 and region["paragraphs"]:
+                    return True
+        return False
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        if collect():
+            return paragraphs[:max_paragraphs]
     try:
-        resp = requests.get(url, timeout=5)
-        if resp.status_code == 200:
-            soup = BeautifulSoup(resp.text, "html.parser")
-            paragraphs = soup.find_all("p")
-            text_content = [p.get_text().strip() for p in paragraphs[:max_paragraphs] if p.get_text().strip()]
-            return "\n".join(text_content)
-        return ""
+        parser.close()
+    except etree.XMLSyntaxError:
+        pass
+    collect()
+    return paragraphs[:max_paragraphs]
+
+def _iter_capped(resp, max_bytes):
+    received = 0
+    for chunk in resp.iter_content(chunk_size=SCRAPE_CHUNK_SIZE):
+        if not chunk:
+            continue
+        yield chunk[:max_bytes - received]
+        received += len(chunk)
+        if received >= max_bytes:
+            return
+
+def scrape_page(url, max_paragraphs=2, max_bytes=SCRAPE_MAX_BYTES, parser=SCRAPE_PARSER):
+    # Stream the body and stop parsing as soon as the first paragraphs (or a
+    # closed <main>/<article> region) are found, instead of building a full tree.
+    try:
+        with requests.get(url, timeout=5, stream=True) as resp:
+            if resp.status_code != 200:
+                return ""
+            encoding = resp.encoding or "utf-8"
+            try:
+                codecs.lookup(encoding)
+            except LookupError:
+                encoding = "utf-8"
+            chunks = _iter_capped(resp, max_bytes)
+            if parser == "lxml" and etree is not None:
+                try:
+                    paragraphs = _extract_paragraphs_lxml(chunks, max_paragraphs, encoding)
+                except LookupError:
+                    # libxml2 rejects some Python codec names (e.g. "latin_1"); the pull
+                    # parser is built before any chunk is read, so fall back cleanly.
+                    paragraphs = _extract_paragraphs_stdlib(chunks, max_paragraphs, encoding)
+            else:
+                paragraphs = _extract_paragraphs_stdlib(chunks, max_paragraphs, encoding)
+            return "\n".join(paragraphs)
     except:
         return ""
 
+class SingleFlightAborted(Exception):
+    pass
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one in-flight call."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, timeout=SINGLE_FLIGHT_TIMEOUT):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        if not leader:
+            try:
+                return future.result(timeout=timeout)
+            except (SingleFlightAborted, FutureTimeoutError):
+                # The leader was interrupted or is stalled; fetch for this session instead.
+                return fn(*args)
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+            # Streamlit's RerunException/StopException are BaseExceptions that belong
+            # to the leader's session only, so followers must not wait on them.
+            if not future.done():
+                future.set_exception(SingleFlightAborted())
+        return future.result()
+
+@st.cache_resource(show_spinner=False)
+def get_single_flight():
+    # Shared across sessions; a module-level instance would be recreated on every rerun.
+    return SingleFlight()
+
+def _scrape_link(link):
+    if link.lower().endswith(".pdf"):
+        return scrape_pdf(link)
+    return scrape_page(link)
+
+_MINHASH_PRIME = (1 << 61) - 1
+_minhash_rng = random.Random(1729)
+_MINHASH_PARAMS = [
+    (_minhash_rng.randrange(1, _MINHASH_PRIME), _minhash_rng.randrange(0, _MINHASH_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+SHINGLE_PATTERN = re.compile(r"\w+")
+
+def minhash_signature(text, shingle_size=SHINGLE_SIZE, max_tokens=MINHASH_MAX_TOKENS):
+    # Unicode-aware and keeps stopwords, so Urdu/Hindi pages shingle like English ones.
+    # Only the leading max_tokens are hashed so full PDF texts stay cheap; the exact
+    # SHA-1 check in dedupe_documents still covers the whole text.
+    tokens = [match.group().lower() for match in itertools.islice(SHINGLE_PATTERN.finditer(text), max_tokens)]
+    if len(tokens) < shingle_size:
+        return None
+    shingles = {" ".join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)}
+    hashes = [int.from_bytes(hashlib.blake2b(sh.encode(), digest_size=8).digest(), "big") for sh in shingles]
+    return [min((a * h + b) % _MINHASH_PRIME for h in hashes) for a, b in _MINHASH_PARAMS]
+
+def estimate_similarity(sig_a, sig_b):
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+def dedupe_documents(items, threshold=NEAR_DUPLICATE_THRESHOLD):
+    # Exact duplicates are caught by a content hash; near duplicates by MinHash.
+    seen_hashes = set()
+    signatures = []
+    unique = []
+    for item in items:
+        text = " ".join((item.get("scraped_text") or item.get("snippet", "")).split())
+        if not text:
+            unique.append(item)
+            continue
+        digest = hashlib.sha1(text.lower().encode()).hexdigest()
+        if digest in seen_hashes:
+            continue
+        seen_hashes.add(digest)
+        # Texts too short to shingle are only matched on the exact hash above.
+        signature = minhash_signature(text)
+        if signature is not None:
+            if any(estimate_similarity(signature, other) >= threshold for other in signatures):
+                continue
+            signatures.append(signature)
+        unique.append(item)
+    return unique
+
 def comprehensive_web_research(query, max_results=5):
-    search_results = duckduckgo_search(query)
-    limited_results = search_results[:max_results]
+    flight = get_single_flight()
+    search_results = flight.do(("search", query), duckduckgo_search, query)
+    limited_results = []
+    seen_links = set()
+    for result in search_results:
+        link = result.get("link", "")
+        if link and link in seen_links:
+            continue
+        seen_links.add(link)
+        # Copy so sessions sharing a coalesced search result never mutate each other's items.
+        limited_results.append(dict(result))
+        if len(limited_results) >= max_results:
+            break
     for item in limited_results:
         link = item.get("link", "")
-        if link:
-            if link.lower().endswith(".pdf"):
-                scraped = scrape_pdf(link)
-            else:
-                scraped = scrape_page(link)
-            item["scraped_text"] = scraped
-        else:
-            item["scraped_text"] = ""
-    return limited_results
+        item["scraped_text"] = flight.do(("page", link), _scrape_link, link) if link else ""
+    return dedupe_documents(limited_results)
 
 #####################
 # LOOPHOLE FINDER
@@ -470,6 +730,129 @@ class LegalAdvisor:
         save_query(st.session_state.current_user, text)
         return combined_results, web_results
 
+#####################
+# LEGAL RETRIEVAL INDEX (Chatbot)
+#####################
+TOKEN_PATTERN = re.compile(r"\w+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how",
+    "i", "in", "is", "it", "me", "my", "of", "on", "or", "the", "to", "what", "when", "with"
+}
+STEM_SUFFIXES = (("ies", "y"), ("ied", "y"), ("ing", ""), ("ed", ""), ("es", ""), ("s", ""))
+# Everyday wording mapped to the vocabulary the law texts actually use.
+LEGAL_SYNONYMS = {
+    "steal": ["theft"], "stole": ["theft"], "stolen": ["theft"], "thief": ["theft"],
+    "rob": ["robbery"], "kill": ["murder", "violent"], "attack": ["assault"],
+    "brib": ["bribery"], "marry": ["marriage"], "wife": ["marriage"], "husband": ["marriage"],
+    "pirat": ["copyright"], "patent": ["intellectual"], "sue": ["damages"], "agreement": ["contract"],
+    "scam": ["fraud"], "spy": ["surveillance"], "drug": ["controlled"], "speech": ["opinion"]
+}
+CHAT_CONTEXT_DECAY = 0.5
+CHAT_HISTORY_TURNS = 5
+
+def stem(token):
+    # Light suffix stemmer applied to both passages and queries, so
+    # "Contracts"/"contract" and "divorced"/"divorce" share a term.
+    for suffix, replacement in STEM_SUFFIXES:
+        if token.endswith(suffix) and not token.endswith("ss") and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)] + replacement
+            break
+    if len(token) > 3 and token[-1] == token[-2] and token[-1] not in "lsz":
+        token = token[:-1]
+    if len(token) > 3 and token.endswith("e"):
+        token = token[:-1]
+    return token
+
+def tokenize(text):
+    return [stem(tok) for tok in TOKEN_PATTERN.findall(text.lower()) if tok not in STOPWORDS]
+
+def expand_query_terms(terms):
+    expanded = set(terms)
+    for term in terms:
+        expanded.update(stem(synonym) for synonym in LEGAL_SYNONYMS.get(term, ()))
+    return expanded
+
+class LegalRetrievalIndex:
+    """BM25 inverted index over the global and local law passages."""
+
+    def __init__(self, passages, k1=1.5, b=0.75):
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.doc_lengths = []
+        for doc_id, passage in enumerate(passages):
+            # Titles are short and descriptive, so count their terms twice.
+            terms = Counter(tokenize(passage["title"]) * 2 + tokenize(passage["text"]))
+            self.doc_lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings.setdefault(term, []).append((doc_id, tf))
+        total = len(passages)
+        self.avg_length = (sum(self.doc_lengths) / total) if total else 1.0
+        self.idf = {
+            term: math.log(1 + (total - len(plist) + 0.5) / (len(plist) + 0.5))
+            for term, plist in self.postings.items()
+        }
+
+    def score(self, query):
+        scores = {}
+        for term in expand_query_terms(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = self.idf[term]
+            for doc_id, tf in plist:
+                norm = tf + self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return scores
+
+    def rerank(self, query, context_scores=None, decay=CHAT_CONTEXT_DECAY):
+        # Carry the previous turn's scores forward with decay so follow-up
+        # questions stay anchored to the topic without rescoring old turns.
+        scores = {doc_id: score * decay for doc_id, score in (context_scores or {}).items()}
+        current = self.score(query)
+        for doc_id, score in current.items():
+            scores[doc_id] = scores.get(doc_id, 0.0) + score
+        # Drop context that has decayed to noise so the dict stays small.
+        return {doc_id: score for doc_id, score in scores.items() if doc_id in current or score > 0.05}, current
+
+    def top(self, scores, current, top_k=3):
+        # Only laws matching the current question are answers; the carried
+        # context just boosts and breaks ties among them.
+        best = heapq.nlargest(top_k, current, key=lambda doc_id: (scores[doc_id], current[doc_id]))
+        return [self.passages[doc_id] for doc_id in best]
+
+def build_law_passages(country):
+    passages = []
+    for category, law_list in ALL_LAWS.items():
+        for law_item in law_list:
+            passages.append({
+                "title": law_item["title"],
+                "text": law_item["details"],
+                "type": category.capitalize(),
+                "enforcement_agency": "N/A (Global Database)"
+            })
+    for law in LegalKnowledgeBase(country).laws:
+        passages.append({
+            "title": law["title"],
+            "text": law["text"],
+            "type": law["type"],
+            "enforcement_agency": law["enforcement_agency"]
+        })
+    for passage in passages:
+        passage["loopholes"] = find_potential_loopholes(passage["text"])
+    return passages
+
+@st.cache_resource(show_spinner=False, max_entries=len(COUNTRIES))
+def load_retrieval_index(country, laws_mtime):
+    # laws_mtime is only part of the cache key, so edits to the country JSON rebuild the index.
+    return LegalRetrievalIndex(build_law_passages(country))
+
+def retrieval_index_key(country):
+    file_path = DATA_DIR / f"laws_{country.lower()}.json"
+    laws_mtime = file_path.stat().st_mtime if file_path.exists() else 0
+    return country, laws_mtime
+
 #####################
 # VOICE & TTS FUNCTIONS
 #####################
@@ -529,6 +912,90 @@ def generate_pdf(report_text):
     pdf.output(pdf_file)
     return pdf_file
 
+#####################
+# RESULTS VIEW (shared by Analysis & Voice tabs)
+#####################
+def build_report(laws, web_results):
+    report = ""
+    for law in laws:
+        report += f"""
+Title: {law['title']}
+Type: {law['type']}
+Enforcement Agency: {law['enforcement_agency']}
+Details: {law['text']}
+""" + "\n"
+        for snippet in law.get("loopholes", []):
+            report += f"Loophole: {snippet}\n"
+    for i, item in enumerate(web_results, start=1):
+        report += f"Web Result #{i}: {item.get('title', 'No Title')}\nSnippet: {item.get('snippet', '')}\nScraped: {item.get('scraped_text', '')}\n---\n"
+    return report
+
+def store_results(key, laws, web_results, **extra):
+    previous = st.session_state.get(f"{key}_results")
+    run_id = previous["run_id"] + 1 if previous else 0
+    st.session_state[f"{key}_results"] = {"laws": laws, "web_results": web_results, "run_id": run_id, **extra}
+    # New results start from the first page again, with every result collapsed.
+    st.session_state.pop(f"{key}_laws_page", None)
+    st.session_state.pop(f"{key}_web_page", None)
+    for state_key in [k for k in st.session_state.keys() if k.startswith(f"{key}_full_")]:
+        del st.session_state[state_key]
+
+def paginate(key, total, page_size=RESULTS_PAGE_SIZE):
+    pages = max(1, math.ceil(total / page_size))
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1, key=key)
+    start = (page - 1) * page_size
+    end = min(total, start + page_size)
+    st.caption(f"Showing {start + 1}–{end} of {total}")
+    return slice(start, end)
+
+def render_results(key, results, laws_heading, web_heading):
+    # Only one page of laws and web results is sent per rerun, and each law needs
+    # at most two elements, so the payload stays constant however many laws match.
+    laws = results["laws"]
+    web_results = results["web_results"]
+    st.subheader(laws_heading)
+    if laws:
+        for law in laws[paginate(f"{key}_laws_page", len(laws))]:
+            st.markdown(f"""
+<div style='padding:10px;border-radius:5px;background:#1e1e1e;margin:5px'>
+    <h4 style='color:#2d4059'>{law['title']}</h4>
+    <p style='color:#ffffff'>{law['text']}</p>
+    <p style='color:#ff4500'><strong>Type:</strong> {law['type']}</p>
+    <p style='color:#ffcc00'><strong>Enforcement Agency:</strong> {law['enforcement_agency']}</p>
+</div>
+""", unsafe_allow_html=True)
+            if law.get("loopholes"):
+                loopholes = "\n".join(f"- {snippet}" for snippet in law["loopholes"])
+                st.markdown(f"**Potential Loopholes / Exceptions Found:**\n\n{loopholes}\n\n---")
+    else:
+        st.warning("No relevant laws found.")
+
+    st.subheader(web_heading)
+    if web_results:
+        page = paginate(f"{key}_web_page", len(web_results))
+        for i, item in enumerate(web_results[page], start=page.start + 1):
+            title = item.get("title", "No Title")
+            link = item.get("link", "")
+            snippet = item.get("snippet", "")
+            scraped_text = item.get("scraped_text", "").strip()
+            body = f"**Result #{i}:** [{title}]({link})"
+            if snippet.strip():
+                body += f"\n\n**Snippet:** {snippet}"
+            if scraped_text:
+                preview = scraped_text[:SCRAPED_PREVIEW_CHARS]
+                if len(scraped_text) > SCRAPED_PREVIEW_CHARS:
+                    preview += "…"
+                body += f"\n\n**Scraped Content:**\n\n{preview}"
+            st.markdown(body)
+            # The full page text is only sent once the user asks for it.
+            if len(scraped_text) > SCRAPED_PREVIEW_CHARS and st.checkbox("Show full scraped content", key=f"{key}_full_{results['run_id']}_{i}"):
+                st.write(scraped_text)
+            st.write("---")
+    else:
+        st.write("No additional web results found.")
+
 #####################
 # SIDEBAR & MAIN TABS
 #####################
@@ -567,72 +1034,31 @@ with tabs[0]:
             if link_input:
                 urls = [url.strip() for url in link_input.split(",") if url.strip()]
                 for url in urls:
-                    if url.lower().endswith(".pdf"):
-                        scraped_content = scrape_pdf(url)
-                    else:
-                        scraped_content = scrape_page(url)
+                    scraped_content = _scrape_link(url)
                     if scraped_content:
                         combined_text += "\n" + scraped_content
             advisor = LegalAdvisor(st.session_state.country)
             all_laws_found, web_results = advisor.analyze(combined_text)
-            report = ""
-            st.subheader("Legal Analysis Report")
-            if all_laws_found:
-                for law in all_laws_found:
-                    block = f"""
-Title: {law['title']}
-Type: {law['type']}
-Enforcement Agency: {law['enforcement_agency']}
-Details: {law['text']}
-"""
-                    st.markdown(f"""
-<div style='padding:10px;border-radius:5px;background:#1e1e1e;margin:5px'>
-    <h4 style='color:#2d4059'>{law['title']}</h4>
-    <p style='color:#ffffff'>{law['text']}</p>
-    <p style='color:#ff4500'><strong>Type:</strong> {law['type']}</p>
-    <p style='color:#ffcc00'><strong>Enforcement Agency:</strong> {law['enforcement_agency']}</p>
-</div>
-""", unsafe_allow_html=True)
-                    report += block + "\n"
-                    if law.get("loopholes"):
-                        st.write("**Potential Loopholes / Exceptions Found:**")
-                        for snippet in law["loopholes"]:
-                            st.markdown(f"- {snippet}")
-                            report += f"Loophole: {snippet}\n"
-                        st.write("---")
-            else:
-                st.warning("No relevant laws found.")
-
-            st.subheader("Comprehensive Web Research")
-            if web_results:
-                for i, item in enumerate(web_results, start=1):
-                    title = item.get("title", "No Title")
-                    link = item.get("link", "")
-                    snippet = item.get("snippet", "")
-                    scraped_text = item.get("scraped_text", "")
-                    st.markdown(f"**Result #{i}:** [{title}]({link})")
-                    if snippet.strip():
-                        st.write(f"**Snippet:** {snippet}")
-                    if scraped_text.strip():
-                        st.write("**Scraped Content:**")
-                        st.write(scraped_text)
-                    st.write("---")
-                    report += f"Web Result #{i}: {title}\nSnippet: {snippet}\nScraped: {scraped_text}\n---\n"
-            else:
-                st.write("No additional web results found.")
-
-            if st.download_button("Download Analysis Report (TXT)", report, "analysis_report.txt", "text/plain"):
-                st.success("Report downloaded!")
+            report = build_report(all_laws_found, web_results)
             pdf_file = generate_pdf(report)
             with open(pdf_file, "rb") as f:
-                st.download_button("Download Analysis Report (PDF)", f, pdf_file, "application/pdf")
+                pdf_bytes = f.read()
+            store_results("analysis", all_laws_found, web_results, report=report, pdf_file=pdf_file, pdf_bytes=pdf_bytes)
 
-            law_types = [law["type"] for law in all_laws_found] if all_laws_found else []
-            if law_types:
-                df = pd.DataFrame(law_types, columns=["Type"])
-                st.bar_chart(df["Type"].value_counts())
-            else:
-                st.write("No law types to display in chart.")
+    analysis_results = st.session_state.get("analysis_results")
+    if analysis_results:
+        render_results("analysis", analysis_results, "Legal Analysis Report", "Comprehensive Web Research")
+
+        if st.download_button("Download Analysis Report (TXT)", analysis_results["report"], "analysis_report.txt", "text/plain"):
+            st.success("Report downloaded!")
+        st.download_button("Download Analysis Report (PDF)", analysis_results["pdf_bytes"], analysis_results["pdf_file"], "application/pdf")
+
+        law_types = [law["type"] for law in analysis_results["laws"]]
+        if law_types:
+            df = pd.DataFrame(law_types, columns=["Type"])
+            st.bar_chart(df["Type"].value_counts())
+        else:
+            st.write("No law types to display in chart.")
 
 ###############
 # TAB 2: VOICE INPUT
@@ -650,40 +1076,10 @@ with tabs[1]:
             with st.spinner("Analyzing voice query..."):
                 advisor = LegalAdvisor(st.session_state.country)
                 all_laws_found, web_results = advisor.analyze(recognized)
-                st.subheader("Voice Query Analysis Report")
-                if all_laws_found:
-                    for law in all_laws_found:
-                        st.markdown(f"""
-<div style='padding:10px;border-radius:5px;background:#1e1e1e;margin:5px'>
-    <h4 style='color:#2d4059'>{law['title']}</h4>
-    <p style='color:#ffffff'>{law['text']}</p>
-    <p style='color:#ff4500'><strong>Type:</strong> {law['type']}</p>
-    <p style='color:#ffcc00'><strong>Enforcement Agency:</strong> {law['enforcement_agency']}</p>
-</div>
-""", unsafe_allow_html=True)
-                        if law.get("loopholes"):
-                            st.write("**Potential Loopholes / Exceptions Found:**")
-                            for snippet in law["loopholes"]:
-                                st.markdown(f"- {snippet}")
-                            st.write("---")
-                else:
-                    st.warning("No relevant laws found.")
-                st.subheader("Additional Web Research")
-                if web_results:
-                    for i, item in enumerate(web_results, start=1):
-                        title = item.get("title", "No Title")
-                        link = item.get("link", "")
-                        snippet = item.get("snippet", "")
-                        scraped_text = item.get("scraped_text", "")
-                        st.markdown(f"**Result #{i}:** [{title}]({link})")
-                        if snippet.strip():
-                            st.write(f"**Snippet:** {snippet}")
-                        if scraped_text.strip():
-                            st.write("**Scraped Content:**")
-                            st.write(scraped_text)
-                        st.write("---")
-                else:
-                    st.write("No additional web results found.")
+                store_results("voice", all_laws_found, web_results)
+    voice_results = st.session_state.get("voice_results")
+    if voice_results:
+        render_results("voice", voice_results, "Voice Query Analysis Report", "Additional Web Research")
 
 ###############
 # TAB 3: TAX OPTIMIZATION
@@ -712,15 +1108,39 @@ with tabs[2]:
 ###############
 with tabs[3]:
     st.header("💬 Legal Chatbot")
-    st.markdown("Ask a legal question below and get a simulated answer.")
+    st.markdown("Ask a legal question below and get the best-matching laws from the database.")
+    index_key = retrieval_index_key(st.session_state.country)
+    index = load_retrieval_index(*index_key)
+    # chat_scores hold doc ids of one particular index, so a new country or an
+    # edited laws file starts a fresh conversation.
+    if st.session_state.chat_index_key != index_key:
+        st.session_state.chat_history = []
+        st.session_state.chat_scores = {}
+        st.session_state.chat_index_key = index_key
     user_question = st.text_input("Your Question:")
-    if st.button("Get Answer"):
-        if "contract" in user_question.lower():
-            answer = "Contracts require offer, acceptance, and consideration. Always review key terms carefully."
-        elif "privacy" in user_question.lower():
-            answer = "Privacy laws protect you from unlawful searches and require data protection measures."
-        elif "trial" in user_question.lower():
-            answer = "A fair trial ensures due process, the right to counsel, and an impartial jury."
+    col_ask, col_clear = st.columns([1, 1])
+    with col_clear:
+        if st.button("Clear Conversation"):
+            st.session_state.chat_history = []
+            st.session_state.chat_scores = {}
+    with col_ask:
+        ask = st.button("Get Answer")
+    if ask and user_question:
+        scores, current = index.rerank(user_question, st.session_state.chat_scores)
+        st.session_state.chat_scores = scores
+        st.session_state.chat_history.append({
+            "question": user_question,
+            "passages": index.top(scores, current)
+        })
+        st.session_state.chat_history = st.session_state.chat_history[-CHAT_HISTORY_TURNS:]
+    # One markdown element per turn keeps each rerun's payload bounded.
+    for turn in reversed(st.session_state.chat_history):
+        answer = f"**You:** {turn['question']}\n\n**Chatbot Answer:**"
+        if turn["passages"]:
+            for law in turn["passages"]:
+                answer += f"\n\n**{law['title']}** ({law['type']}) — {law['text']}"
+                if law["loopholes"]:
+                    answer += "\n" + "\n".join(f"- {snippet}" for snippet in law["loopholes"])
         else:
-            answer = "This is a complex legal question. Please consult a qualified attorney for detailed advice."
-        st.markdown(f"**Chatbot Answer:** {answer}")
+            answer += " This is a complex legal question. Please consult a qualified attorney for detailed advice."
+        st.markdown(answer + "\n\n---")